@@ -24,7 +24,7 @@ USAGE EXAMPLES
   1) Download and configure reference once:
       barcode_vote download --write-config
 
-  2) Classify reads (FASTQ; gz supported):
+  2) Classify reads (FASTQ; .gz/.zst supported, .zst needs zstd on PATH):
       barcode_vote classify \
         -q fastp/SAMPLE.fastq.gz \
         -o out/SAMPLE \
@@ -34,28 +34,41 @@ USAGE EXAMPLES
         -N 10 --secondary no \
         --save-filtered-hits
 
-  3) Classify contigs (FASTA; gz supported):
+  3) Classify contigs (FASTA; .gz/.zst supported):
       barcode_vote classify -q contigs.fasta -o out/contigs -t 28
 
-  4) Use a shared reference (override cache):
+  4) Large zstd run: parse/vote PAF in 4 worker processes, keep input order:
+      barcode_vote classify -q reads.fq.zst -o out/sample -t 56 -j 4 --no-sort
+
+  5) Use a shared reference (override cache):
       export BARCODE_REF_MMI=/shared/db/barcode_ref.mmi
       barcode_vote classify -q reads.fq.gz -o out/sample
 
-  5) Check which reference will be used:
+  6) Check which reference will be used:
       barcode_vote show-ref -v
 """
 
 from __future__ import annotations
 
 import collections
+import contextlib
 import hashlib
+import itertools
+import math
+import mmap
+import multiprocessing
 import os
+import queue
 import shutil
+import stat
 import subprocess
 import sys
+import threading
 import urllib.request
+from concurrent.futures import Future, ProcessPoolExecutor
+from fractions import Fraction
 from pathlib import Path
-from typing import DefaultDict, Optional, Tuple, TextIO
+from typing import BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import typer
 from rich.console import Console
@@ -74,6 +87,26 @@ ENV_SHA256 = "BARCODE_REF_SHA256"
 DEFAULT_REF_URL = "https://github.com/ypchan/barcode-vote-classifier/releases/download/v0.1.0/barcode_ref.mmi"
 DEFAULT_REF_SHA256 = "d97974d1e871875f449423ddf1b40ecab801df1e24c6f7e5f0af52dcc56e0087"
 
+# PAF is consumed in chunks of roughly this many bytes (whole lines).
+PAF_CHUNK_BYTES = 1 << 20
+PAF_WORKER_CHUNK_BYTES = 4 << 20
+# Pipe buffer for minimap2 stdout (binary, no per-line decoding).
+PAF_PIPE_BUFSIZE = 1 << 20
+# Readahead hint for the head of the query file; bounded so it cannot evict minimap2's index.
+QUERY_PREFETCH_BYTES = 64 << 20
+# Read size for sha256 when the file cannot be mmapped.
+HASH_CHUNK_BYTES = 8 << 20
+# Socket read size for reference downloads.
+DOWNLOAD_CHUNK_BYTES = 8 << 20
+# Download buffers in flight between the reader and the hashing thread.
+DOWNLOAD_BUFFERS = 4
+# Minimum bytes between progress bar redraws.
+PROGRESS_STEP_BYTES = 8 << 20
+# Write buffer for TSV outputs.
+OUT_BUFSIZE = 1 << 20
+# final_results.tsv rows joined and encoded per write() call.
+OUT_BATCH_ROWS = 1 << 16
+
 console = Console()
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 
@@ -106,11 +139,20 @@ def cache_dir(prefer_tmp: bool = True) -> Path:
     return Path.home() / ".cache" / APP_NAME
 
 
+def stat_or_none(p: Path) -> Optional[os.stat_result]:
+    """Single stat() syscall in place of exists() + stat(); None if the path is unavailable."""
+    try:
+        return p.stat()
+    except OSError:
+        return None
+
+
 def read_config_ref() -> Optional[str]:
-    cfg = config_file()
-    if not cfg.exists():
+    try:
+        text = config_file().read_text()
+    except FileNotFoundError:
         return None
-    for line in cfg.read_text().splitlines():
+    for line in text.splitlines():
         line = line.strip()
         if not line or line.startswith("#"):
             continue
@@ -131,10 +173,25 @@ def write_config_ref(path: str) -> None:
 # sha256 / Download
 # -----------------------------
 def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
+    # Unbuffered: the fallback reads into its own buffer, skip the extra BufferedReader copy.
+    with path.open("rb", buffering=0) as f:
+        # Map the file and hash it in one call: no userspace copy, GIL released throughout.
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                return hashlib.sha256(mm).hexdigest()
+        except (OSError, ValueError, OverflowError):
+            pass  # empty or unmappable file (or too large for the address space): read it instead
+
+        h = hashlib.sha256()
+        buf = bytearray(HASH_CHUNK_BYTES)
+        mv = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(mv[:n])
     return h.hexdigest()
 
 
@@ -155,9 +212,34 @@ def normalize_sha256(s: str) -> str:
     return s
 
 
+def verified_sidecar(path: Path) -> Path:
+    """Sidecar recording a successful sha256 check: '<sha256>  <size>  <mtime_ns>'."""
+    return path.with_suffix(path.suffix + ".verified")
+
+
+def write_verified_sidecar(path: Path, sha256: str) -> None:
+    """Best-effort: a read-only reference directory only costs a re-hash next time."""
+    side = verified_sidecar(path)
+    try:
+        st = path.stat()
+        side.write_text(f"{sha256}  {st.st_size}  {st.st_mtime_ns}\n")
+    except OSError as e:
+        console.print(f"[yellow]WARN[/yellow] Could not write {side}: {e.strerror or e}")
+
+
+def sidecar_matches(path: Path, sha256: str, st: os.stat_result) -> bool:
+    """True if the sidecar vouches for sha256 and path's size/mtime (st) are unchanged since."""
+    try:
+        fields = verified_sidecar(path).read_text().split()
+    except OSError:
+        return False
+    return fields == [sha256, str(st.st_size), str(st.st_mtime_ns)]
+
+
 def download_with_progress(url: str, dest: Path, expected_sha256: str) -> None:
     """
     Download a file with a progress bar and verify sha256.
+    The hash is computed on the fly while writing, so the file is never re-read.
     On sha256 mismatch, removes temporary file and raises.
     """
     dest.parent.mkdir(parents=True, exist_ok=True)
@@ -166,31 +248,66 @@ def download_with_progress(url: str, dest: Path, expected_sha256: str) -> None:
     console.print(f"[yellow]INFO[/yellow] Downloading: {url}")
     console.print(f"[yellow]INFO[/yellow] To: {dest}")
 
-    req = urllib.request.Request(url, headers={"User-Agent": "barcode_vote/1.0"})
+    # identity: the sha256 is of the raw file, never let a proxy re-encode it.
+    req = urllib.request.Request(url, headers={"User-Agent": "barcode_vote/1.0", "Accept-Encoding": "identity"})
     with urllib.request.urlopen(req) as resp:
         total = resp.headers.get("Content-Length")
         total_size = int(total) if total and total.isdigit() else None
 
-        progress = Progress(
-            "[progress.description]{task.description}",
-            BarColumn(),
-            DownloadColumn(),
-            TransferSpeedColumn(),
-            TimeRemainingColumn(),
-            console=console,
-        )
-        task_id = progress.add_task("Downloading", total=total_size)
-
+        # No progress bar when output is not a terminal (batch/HPC logs); it would only add render cost.
+        progress: Optional[Progress] = None
+        if console.is_terminal:
+            progress = Progress(
+                "[progress.description]{task.description}",
+                BarColumn(),
+                DownloadColumn(),
+                TransferSpeedColumn(),
+                TimeRemainingColumn(),
+                console=console,
+            )
+            task_id = progress.add_task("Downloading", total=total_size)
+        pending = 0
+
+        # Hash on a helper thread so socket/disk I/O and sha256 overlap (both release the GIL).
+        # Buffers rotate between the two threads via free/filled queues; none are allocated per read.
         h = hashlib.sha256()
-        with progress:
-            with tmp.open("wb") as out:
-                while True:
-                    chunk = resp.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    out.write(chunk)
-                    h.update(chunk)
-                    progress.update(task_id, advance=len(chunk))
+        free: "queue.Queue[bytearray]" = queue.Queue()
+        filled: "queue.Queue[Optional[Tuple[bytearray, int]]]" = queue.Queue()
+        for _ in range(DOWNLOAD_BUFFERS):
+            free.put(bytearray(DOWNLOAD_CHUNK_BYTES))
+
+        def hash_worker() -> None:
+            while True:
+                item = filled.get()
+                if item is None:
+                    return
+                buf, n = item
+                h.update(memoryview(buf)[:n])
+                free.put(buf)
+
+        hasher = threading.Thread(target=hash_worker, daemon=True)
+        hasher.start()
+        try:
+            with progress if progress is not None else contextlib.nullcontext():
+                with tmp.open("wb") as out:
+                    while True:
+                        buf = free.get()
+                        n = resp.readinto(buf)
+                        if not n:
+                            break
+                        out.write(memoryview(buf)[:n])
+                        filled.put((buf, n))
+                        if progress is not None:
+                            # Throttle redraws to one per PROGRESS_STEP_BYTES (reads can be short).
+                            pending += n
+                            if pending >= PROGRESS_STEP_BYTES:
+                                progress.update(task_id, advance=pending)
+                                pending = 0
+                    if progress is not None and pending:
+                        progress.update(task_id, advance=pending)
+        finally:
+            filled.put(None)
+            hasher.join()
 
         got = h.hexdigest().lower()
 
@@ -199,6 +316,7 @@ def download_with_progress(url: str, dest: Path, expected_sha256: str) -> None:
         raise RuntimeError(f"sha256 mismatch: expected={expected_sha256} got={got}")
 
     tmp.replace(dest)
+    write_verified_sidecar(dest, got)
     console.print(f"[bold green]OK[/bold green] Downloaded & verified: {dest}")
 
 
@@ -231,7 +349,8 @@ def resolve_ref_path(cli_ref: Optional[str], prefer_tmp_cache: bool = True) -> T
             return str(p), "config"
 
     cached = cache_dir(prefer_tmp=prefer_tmp_cache) / "barcode_ref.mmi"
-    if cached.exists() and cached.stat().st_size > 0:
+    st = stat_or_none(cached)
+    if st is not None and st.st_size > 0:
         return str(cached), "cache"
 
     raise FileNotFoundError(
@@ -250,37 +369,243 @@ def require_exe(name: str) -> None:
         raise RuntimeError(f"'{name}' not found in PATH. Please install it or load a module that provides it.")
 
 
-def parse_paf_line(line: str):
+def decompressor_cmd(path: Path) -> Optional[List[str]]:
     """
-    Parse minimap2 PAF.
-    Required fields:
-      1  qname
-      2  qlen
-      6  tname
-      7  tlen
-      10 nmatch
-      11 alnlen
-      12 mapq
+    External decompressor for a compressed query, piped into minimap2's stdin.
+      .gz  -> pigz -dc (if available; otherwise minimap2 reads the .gz itself)
+      .zst -> zstd -dc (required; minimap2 cannot read zstd)
+    Returns None when minimap2 should read the file directly.
     """
-    parts = line.split("\t")
-    if len(parts) < 12:
-        return None
+    name = path.name.lower()
+    if name.endswith(".gz") and shutil.which("pigz"):
+        return ["pigz", "-dc", str(path)]
+    if name.endswith(".zst"):
+        require_exe("zstd")
+        return ["zstd", "-T0", "-dc", str(path)]
+    return None
+
+
+def fadvise(fd: int, advice: str, offset: int = 0, length: int = 0) -> None:
+    """Best-effort posix_fadvise hint, e.g. advice="WILLNEED"; no-op where unsupported."""
     try:
-        qname = parts[0]
-        qlen = int(parts[1])
-        tname = parts[5]
-        tlen = int(parts[6])
-        nmatch = int(parts[9])
-        alnlen = int(parts[10])
-        mapq = int(parts[11])
-        return qname, tname, qlen, tlen, nmatch, alnlen, mapq
-    except ValueError:
-        return None
+        os.posix_fadvise(fd, offset, length, getattr(os, "POSIX_FADV_" + advice))
+    except (AttributeError, OSError):
+        pass
+
+
+def grow_pipe(fd: int, size: int) -> None:
+    """Best-effort Linux F_SETPIPE_SZ so a fast producer does not block on the default 64 KiB pipe."""
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import fcntl
+
+        fcntl.fcntl(fd, getattr(fcntl, "F_SETPIPE_SZ", 1031), size)
+    except (ImportError, OSError):
+        pass  # e.g. size above /proc/sys/fs/pipe-max-size for unprivileged users
 
 
-def category_from_target(tname: str, sep: str) -> str:
-    """Extract the major category prefix from the target ID."""
-    return tname.split(sep)[0] if sep in tname else "unclassified"
+def iter_paf_chunks(stream, size: int = PAF_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Read a binary stream in ~size-byte blocks, each cut after its last newline so that it
+    holds only complete lines. The partial trailing line is carried into the next block.
+    """
+    carry = b""
+    while True:
+        buf = stream.read(size)
+        if not buf:
+            break
+        cut = buf.rfind(b"\n") + 1
+        if not cut:
+            carry += buf
+            continue
+        yield carry + buf[:cut]
+        carry = buf[cut:]
+    if carry:
+        yield carry
+
+
+def category_from_target(tname: bytes, sep: bytes) -> str:
+    """Extract the major category prefix from the raw target ID (one find, only the prefix is decoded)."""
+    i = tname.find(sep)
+    return tname[:i].decode("utf-8") if i >= 0 else "unclassified"
+
+
+def threshold_ratio(thr: float) -> Tuple[int, int]:
+    """
+    Threshold as an exact (numerator, denominator) of its decimal form (0.3 -> 3, 10),
+    so x/y > thr can be tested as x*den > num*y in integers.
+    """
+    f = Fraction(repr(float(thr)))
+    return f.numerator, f.denominator
+
+
+PafChunkResult = Tuple[int, int, Dict[Tuple[str, str], int], bytes]
+
+# Per-process memo of category_from_target(): sep -> {raw tname bytes: category}.
+# Target IDs repeat across hits and are bounded by the reference size.
+_category_cache: Dict[str, Dict[bytes, str]] = {}
+
+
+def process_paf_chunk(
+    chunk: bytes,
+    id_ratio: Tuple[int, int],
+    cov_ratio: Tuple[int, int],
+    min_mapq: int,
+    sep: str,
+    want_hits: bool,
+) -> PafChunkResult:
+    """
+    Parse, filter and tally one chunk of complete PAF lines in a single pass;
+    runs in a worker process when --workers > 1.
+    Keeps hits with mapq >= min_mapq, identity > id_thr and coverage > cov_thr,
+    with the thresholds given as threshold_ratio() pairs.
+    Returns (paf_lines, kept_hits, votes, hits_tsv); hits_tsv is b"" unless want_hits.
+    """
+    n = 0
+    kept = 0
+    votes: Dict[Tuple[str, str], int] = {}
+    hits: List[bytes] = []
+    # Specialize for the default --min-mapq 0: every mapq passes, so skip parsing it.
+    check_mapq = min_mapq > 0
+    # Split off at most the 12 used columns; mapq (column 12) only needs its own field when checked.
+    maxsplit = 12 if check_mapq else 11
+    id_num, id_den = id_ratio
+    cov_num, cov_den = cov_ratio
+    # Hot-loop locals.
+    votes_get = votes.get
+    sep_b = sep.encode("utf-8")
+    cat_cache = _category_cache.setdefault(sep, {})
+    cat_get = cat_cache.get
+    hits_append = hits.append
+    # Decode each read ID once per chunk; repeat hits reuse the same str object.
+    qname_pool: Dict[bytes, str] = {}
+    qname_get = qname_pool.get
+
+    it = iter(chunk.split(b"\n"))
+    while True:
+        # One try per chunk: a malformed integer column aborts the inner loop,
+        # which then resumes with the next line from the same iterator.
+        try:
+            for line in it:
+                if not line:
+                    continue
+                n += 1
+                # PAF columns used: 1 qname, 6 tname, 7 tlen, 10 nmatch, 11 alnlen, 12 mapq.
+                # maxsplit keeps the optional SAM-like tags (cg:Z:, cs:Z:, ...) unsplit.
+                parts = line.split(b"\t", maxsplit)
+                if len(parts) < 12:
+                    continue
+                if check_mapq:
+                    if int(parts[11]) < min_mapq:
+                        continue
+                elif not parts[11][:1].isdigit():
+                    continue  # unparsed mapq: still drop malformed records like int() would
+                alnlen = int(parts[10])
+                tlen = int(parts[6])
+                if alnlen <= 0 or tlen <= 0:
+                    continue
+                # coverage = alnlen/tlen > cov_thr, identity = nmatch/alnlen > id_thr, in integers.
+                # Coverage first: it rejects most hits of short reads against long barcodes,
+                # and nmatch is only parsed for records that survive it.
+                if alnlen * cov_den <= cov_num * tlen:
+                    continue
+                nmatch = int(parts[9])
+                if nmatch * id_den <= id_num * alnlen:
+                    continue
+
+                qb = parts[0]
+                qname = qname_get(qb)
+                if qname is None:
+                    qname = qname_pool[qb] = qb.decode("utf-8")
+                tb = parts[5]
+                cat = cat_get(tb)
+                if cat is None:
+                    cat = cat_cache[tb] = category_from_target(tb, sep_b)
+                k = (qname, cat)
+                votes[k] = votes_get(k, 0) + nmatch
+                kept += 1
+                if want_hits:
+                    # Raw PAF bytes: no formatting or re-encoding.
+                    hits_append(b"%s\t%s\t%s\n" % (qb, tb, parts[9]))
+            break
+        except ValueError:
+            continue
+    return n, kept, votes, b"".join(hits)
+
+
+def map_paf_chunks(
+    chunks: Iterable[bytes], workers: int, *args
+) -> Iterator[PafChunkResult]:
+    """
+    Run process_paf_chunk over chunks in a process pool, yielding results in input order
+    (keeps filtered_hits order and vote tie-breaking identical to the serial path).
+    At most 2*workers chunks are in flight to bound memory.
+    """
+    # fork only on Linux; elsewhere (macOS) forking after system frameworks load is unsafe,
+    # so keep the platform default start method.
+    ctx = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        pending: Deque[Future] = collections.deque()
+        for chunk in chunks:
+            pending.append(ex.submit(process_paf_chunk, chunk, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def pick_winners(votes: Dict[Tuple[str, str], int]) -> Dict[str, Tuple[str, int]]:
+    """
+    Reduce (read_id, category) -> score into read_id -> (winner, score) in one pass.
+    Strict '>' keeps the first-seen category on ties (same as max(..., key=dict.get)).
+    """
+    best: Dict[str, Tuple[str, int]] = {}
+    get = best.get
+    for (rid, cat), n in votes.items():
+        cur = get(rid)
+        if cur is None or n > cur[1]:
+            best[rid] = (cat, n)
+    return best
+
+
+def classify_stream(
+    paf: BinaryIO,
+    *,
+    id_thr: float,
+    cov_thr: float,
+    min_mapq: int,
+    sep: str,
+    workers: int = 1,
+    hits_fh: Optional[BinaryIO] = None,
+) -> Tuple[int, int, Dict[str, Tuple[str, int]]]:
+    """
+    Filter and vote a binary PAF stream (chunked; parallel when workers > 1).
+    Kept hits are written to hits_fh when given.
+    Returns (paf_lines, kept_hits, best) with best: read_id -> (winner, score) in first-seen order.
+    """
+    total_paf = 0
+    kept_hits = 0
+    # (read_id, category) -> summed nmatch; one flat dict instead of a dict per read.
+    votes: Dict[Tuple[str, str], int] = {}
+    votes_get = votes.get
+
+    # Larger chunks for worker processes amortize pickling/IPC per chunk.
+    chunks = iter_paf_chunks(paf, PAF_WORKER_CHUNK_BYTES if workers > 1 else PAF_CHUNK_BYTES)
+    chunk_args = (threshold_ratio(id_thr), threshold_ratio(cov_thr), min_mapq, sep, hits_fh is not None)
+    if workers > 1:
+        results = map_paf_chunks(chunks, workers, *chunk_args)
+    else:
+        results = (process_paf_chunk(chunk, *chunk_args) for chunk in chunks)
+
+    for n, kept_n, part, hits in results:
+        total_paf += n
+        kept_hits += kept_n
+        for k, v in part.items():
+            votes[k] = votes_get(k, 0) + v
+        if hits_fh:
+            hits_fh.write(hits)
+    return total_paf, kept_hits, pick_winners(votes)
 
 
 # -----------------------------
@@ -342,9 +667,16 @@ def cmd_download(
     target_dir.mkdir(parents=True, exist_ok=True)
     dest = target_dir / "barcode_ref.mmi"
 
-    if dest.exists() and dest.stat().st_size > 0 and not force:
+    st = stat_or_none(dest)
+    if st is not None and st.st_size > 0 and not force:
+        if sidecar_matches(dest, s, st):
+            console.print(f"[bold green]OK[/bold green] Skipped re-hash (sidecar valid): {dest}")
+            if write_config:
+                write_config_ref(str(dest))
+            return
         got = sha256_file(dest).lower()
         if got == s:
+            write_verified_sidecar(dest, got)
             console.print(f"[bold green]OK[/bold green] Already downloaded and verified: {dest}")
             if write_config:
                 write_config_ref(str(dest))
@@ -424,10 +756,11 @@ def cmd_show_ref(
 
 @app.command("classify")
 def cmd_classify(
-    query: str = typer.Option(..., "-q", "--query", help="Reads/contigs file (FASTQ/FASTA; .gz supported).", show_default=False),
+    query: str = typer.Option(..., "-q", "--query", help="Reads/contigs file (FASTQ/FASTA; .gz and .zst supported, .zst needs zstd).", show_default=False),
     out_prefix: str = typer.Option(..., "-o", "--out-prefix", help="Output prefix (writes .final_results.tsv).", show_default=False),
     ref: str = typer.Option("", "--ref", help="Reference .mmi path override (highest priority).", show_default=True),
     threads: int = typer.Option(28, "-t", "--threads", help="Threads for minimap2.", show_default=True),
+    workers: int = typer.Option(1, "-j", "--workers", help="Worker processes for PAF parsing/voting (1 = in-process).", show_default=True),
     max_hits: int = typer.Option(10, "-N", "--max-hits", help="minimap2 -N (max hits per query).", show_default=True),
     secondary: str = typer.Option("no", "--secondary", help="Allow secondary alignments (yes/no).", show_default=True),
     preset: str = typer.Option("map-hifi", "--preset", help="minimap2 preset (-x).", show_default=True),
@@ -436,6 +769,7 @@ def cmd_classify(
     min_mapq: int = typer.Option(0, "--min-mapq", help="Keep hits only if mapq >= min_mapq.", show_default=True),
     sep: str = typer.Option("|", "--sep", help="Separator splitting Category from Accession in TargetID.", show_default=True),
     save_filtered_hits: bool = typer.Option(False, "--save-filtered-hits", help="Save <prefix>.filtered_hits.tsv.", show_default=True),
+    no_sort: bool = typer.Option(False, "--no-sort", help="Write final results in query input order instead of sorted by read_id.", show_default=True),
     no_tmp_cache: bool = typer.Option(False, "--no-tmp-cache", help="Do not use TMPDIR as cache location.", show_default=True),
 ):
     """
@@ -450,8 +784,15 @@ def cmd_classify(
     console.print(f"[yellow]INFO[/yellow] Using ref: {ref_path} (source={ref_src})")
 
     q = Path(query)
-    if not q.exists():
+    q_st = stat_or_none(q)
+    if q_st is None:
         raise typer.BadParameter(f"Query not found: {q}")
+    if not sep:
+        raise typer.BadParameter("--sep must not be empty.")
+    if not (math.isfinite(id_thr) and math.isfinite(cov_thr)):
+        raise typer.BadParameter("--id-thr and --cov-thr must be finite numbers.")
+    if workers < 1:
+        raise typer.BadParameter("--workers must be >= 1.")
 
     out_prefix_p = Path(out_prefix)
     out_prefix_p.parent.mkdir(parents=True, exist_ok=True)
@@ -459,73 +800,74 @@ def cmd_classify(
     out_final = str(out_prefix_p) + ".final_results.tsv"
     out_hits = str(out_prefix_p) + ".filtered_hits.tsv"
 
-    vote_bins: DefaultDict[str, DefaultDict[str, int]] = collections.defaultdict(lambda: collections.defaultdict(int))
-
-    hits_fh: Optional[TextIO] = None
+    hits_fh: Optional[BinaryIO] = None
     if save_filtered_hits:
-        hits_fh = open(out_hits, "w", encoding="utf-8")
-        hits_fh.write("read_id\ttarget_id\tscore\n")
+        hits_fh = open(out_hits, "wb", buffering=OUT_BUFSIZE)
+        hits_fh.write(b"read_id\ttarget_id\tscore\n")
 
     cmd = ["minimap2", "-x", preset, "-t", str(threads), "-N", str(max_hits)]
     if secondary == "no":
         cmd.append("--secondary=no")
-    cmd += [ref_path, str(q)]
+    decomp_cmd = decompressor_cmd(q)
+    cmd += [ref_path, "-" if decomp_cmd else str(q)]
 
+    if decomp_cmd:
+        console.print(f"[yellow]INFO[/yellow] Decompressing query: {' '.join(decomp_cmd)}")
     console.print(f"[yellow]INFO[/yellow] Running minimap2: {' '.join(cmd)}")
 
-    # Stream stdout for parsing; let stderr pass through to terminal for real-time debugging.
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=None, text=True, bufsize=1)
+    # Start kernel readahead of the query head so minimap2's reader does not stall on cold storage.
+    # Regular files only: opening a FIFO here would block or steal the writer's stream.
+    if stat.S_ISREG(q_st.st_mode):
+        with q.open("rb") as qf:
+            fadvise(qf.fileno(), "WILLNEED", 0, QUERY_PREFETCH_BYTES)
 
-    total_paf = 0
-    kept_hits = 0
+    decomp: Optional[subprocess.Popen] = None
+    if decomp_cmd:
+        decomp = subprocess.Popen(decomp_cmd, stdout=subprocess.PIPE, bufsize=PAF_PIPE_BUFSIZE)
 
-    assert proc.stdout is not None
-    for line in proc.stdout:
-        line = line.strip()
-        if not line:
-            continue
-        total_paf += 1
-        rec = parse_paf_line(line)
-        if rec is None:
-            continue
-
-        qname, tname, _qlen, tlen, nmatch, alnlen, mapq = rec
-        if alnlen <= 0 or tlen <= 0:
-            continue
-        if mapq < min_mapq:
-            continue
-
-        identity = nmatch / alnlen
-        coverage = alnlen / tlen
+    # Stream raw stdout bytes for parsing; let stderr pass through to terminal for real-time debugging.
+    proc = subprocess.Popen(
+        cmd, stdin=decomp.stdout if decomp else None, stdout=subprocess.PIPE, stderr=None, bufsize=PAF_PIPE_BUFSIZE
+    )
+    if decomp and decomp.stdout:
+        grow_pipe(decomp.stdout.fileno(), PAF_PIPE_BUFSIZE)
+        # minimap2 owns the read end now; closing ours lets the decompressor see SIGPIPE if minimap2 exits.
+        decomp.stdout.close()
 
-        if identity > id_thr and coverage > cov_thr:
-            kept_hits += 1
-            cat = category_from_target(tname, sep)
-            vote_bins[qname][cat] += nmatch
-            if hits_fh:
-                hits_fh.write(f"{qname}\t{tname}\t{nmatch}\n")
+    assert proc.stdout is not None
+    grow_pipe(proc.stdout.fileno(), PAF_PIPE_BUFSIZE)
+    total_paf, kept_hits, best = classify_stream(
+        proc.stdout, id_thr=id_thr, cov_thr=cov_thr, min_mapq=min_mapq, sep=sep, workers=workers, hits_fh=hits_fh
+    )
 
     rc = proc.wait()
+    decomp_rc = decomp.wait() if decomp else 0
     if hits_fh:
         hits_fh.close()
 
     if rc != 0:
         raise RuntimeError(f"minimap2 failed with exit code {rc}")
-
-    stats = collections.defaultdict(int)
-    with open(out_final, "w", encoding="utf-8") as out:
-        out.write("read_id\tfinal_category\tvote_score\n")
-        for rid in sorted(vote_bins.keys()):
-            cats = vote_bins[rid]
-            winner = max(cats, key=cats.get)
-            score = cats[winner]
-            out.write(f"{rid}\t{winner}\t{score}\n")
-            stats[winner] += 1
+    if decomp_rc != 0:
+        raise RuntimeError(f"{decomp_cmd[0]} failed with exit code {decomp_rc}")
+
+    # best is in first-seen (minimap2 input) order; sorting materializes every row again.
+    rows = iter(best.items() if no_sort else sorted(best.items()))
+    # One str join, one encode, one write() per batch of rows: as fast as a single
+    # whole-file buffer, without holding the output in memory several times over.
+    with open(out_final, "wb", buffering=OUT_BUFSIZE) as out:
+        out.write(b"read_id\tfinal_category\tvote_score\n")
+        while True:
+            batch = list(itertools.islice(rows, OUT_BATCH_ROWS))
+            if not batch:
+                break
+            out.write("".join([f"{rid}\t{winner}\t{score}\n" for rid, (winner, score) in batch]).encode("utf-8"))
+
+    stats = collections.Counter(winner for winner, _score in best.values())
 
     # Summary
     console.print("")
     console.print("[bold]SUMMARY[/bold]")
-    console.print(f"paf_lines={total_paf} kept_hits={kept_hits} unique_ids={len(vote_bins)}")
+    console.print(f"paf_lines={total_paf} kept_hits={kept_hits} unique_ids={len(best)}")
 
     for cat in sorted(stats.keys()):
         console.print(f"  {cat}: {stats[cat]}")